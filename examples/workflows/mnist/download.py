@@ -4,11 +4,36 @@ import logging
 from pathlib import Path
 from typing import Dict, Tuple
 
-import torch.utils.data as data
-from torchvision import transforms as tfs
+import torch
 from torchvision.datasets import MNIST
 
 
+LUT = ((torch.arange(256, dtype=torch.float32) / 255.0) - 0.5) / 0.5
+
+
+class TensorLoader:
+    def __init__(
+        self, X: torch.Tensor, Y: torch.Tensor, batch_size: int, shuffle: bool = False
+    ):
+        self.X = X
+        self.Y = Y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.lut = LUT.to(X.device)
+
+    def __len__(self) -> int:
+        return (len(self.X) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        if self.shuffle:
+            idx = torch.randperm(len(self.X), device=self.X.device)
+        else:
+            idx = torch.arange(len(self.X), device=self.X.device)
+        for i in range(0, len(self.X), self.batch_size):
+            sel = idx[i : i + self.batch_size]
+            yield self.lut[self.X[sel].long()], self.Y[sel]
+
+
 def download_mnist(path_to_data: Path, log: logging.Logger):
     log.info(f"Attempting to download MNIST to: {path_to_data}")
     _ = MNIST(path_to_data, train=True, download=True)
@@ -16,17 +41,20 @@ def download_mnist(path_to_data: Path, log: logging.Logger):
 
 
 def load_mnist(
-    path_to_data: Path, batch_size: int
-) -> Tuple[data.DataLoader, data.DataLoader]:
-    mean = [0.5]
-    std = [0.5]
-    transforms = tfs.Compose([tfs.ToTensor(), tfs.Normalize(mean, std)])
-
-    mnist_train = MNIST(path_to_data, train=True, transform=transforms, download=False)
-    mnist_test = MNIST(path_to_data, train=False, transform=transforms, download=False)
-
-    train_loader = data.DataLoader(mnist_train, batch_size=batch_size, shuffle=True)
-    test_loader = data.DataLoader(mnist_test, batch_size=batch_size)
+    path_to_data: Path, batch_size: int, device: torch.device
+) -> Tuple[TensorLoader, TensorLoader]:
+    mnist_train = MNIST(path_to_data, train=True, download=False)
+    mnist_test = MNIST(path_to_data, train=False, download=False)
+
+    X_train = mnist_train.data.to(device)
+    Y_train = mnist_train.targets.to(device)
+    X_test = mnist_test.data.to(device)
+    Y_test = mnist_test.targets.to(device)
+
+    train_loader = TensorLoader(
+        X_train.unsqueeze(1), Y_train, batch_size=batch_size, shuffle=True
+    )
+    test_loader = TensorLoader(X_test.unsqueeze(1), Y_test, batch_size=batch_size)
 
     return train_loader, test_loader
 
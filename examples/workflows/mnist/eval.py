@@ -6,53 +6,18 @@ from typing import Dict, Tuple
 
 import torch
 import torch.nn as nn
-import torch.utils.data as data
 from tqdm import tqdm
-from pathlib import Path
-from typing import Dict, Tuple
-
-import torch.utils.data as data
-from torchvision import transforms as tfs
-from torchvision.datasets import MNIST
-
-def load_mnist(
-    path_to_data: Path, batch_size: int
-) -> Tuple[data.DataLoader, data.DataLoader]:
-    mean = [0.5]
-    std = [0.5]
-    transforms = tfs.Compose([tfs.ToTensor(), tfs.Normalize(mean, std)])
-
-    mnist_train = MNIST(path_to_data, train=True, transform=transforms, download=False)
-    mnist_test = MNIST(path_to_data, train=False, transform=transforms, download=False)
-
-    train_loader = data.DataLoader(mnist_train, batch_size=batch_size, shuffle=True)
-    test_loader = data.DataLoader(mnist_test, batch_size=batch_size)
 
-    return train_loader, test_loader
+from download import TensorLoader, load_mnist
+from model import MNIST_CNN
 
+torch.backends.cudnn.benchmark = True
+torch.set_float32_matmul_precision("high")
 
-class MNIST_CNN(nn.Module):
-    def __init__(self):
-        super(MNIST_CNN, self).__init__()
-
-        self.conv1 = nn.Conv2d(1, 32, kernel_size=5)
-        self.conv2 = nn.Conv2d(32, 64, kernel_size=5)
-
-        self.relu = nn.ReLU(True)
-        self.pool = nn.MaxPool2d(kernel_size=2)
-        self.fc1 = nn.Linear(64 * 4 * 4, 10)
-
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = self.relu(self.pool(self.conv1(x)))
-        x = self.relu(self.pool(self.conv2(x)))
-        x = x.view(-1, 64 * 4 * 4)
-        x = self.fc1(x)
-
-        return nn.functional.log_softmax(x, dim=1)
 
 def eval(
     model: nn.Module,
-    data_loader: data.DataLoader,
+    data_loader: TensorLoader,
     device: torch.device,
     log: logging.Logger,
 ) -> Dict:
@@ -61,31 +26,45 @@ def eval(
     classes = 10
     results = {}
 
-    correct = 0
+    correct = torch.zeros((), device=device, dtype=torch.long)
     total = 0
-    class_correct = list(0.0 for _ in range(classes))
-    class_total = list(0.0 for _ in range(classes))
+    class_correct = torch.zeros(classes, device=device)
+    class_total = torch.zeros(classes, device=device)
 
     model.to(device)
     model.eval()
 
-    for _, (batch_x, batch_y) in enumerate(
-        tqdm(data_loader, unit="batches", desc="Testing...")
-    ):
-        batch_x = batch_x.to(device)
-        batch_y = batch_y.to(device)
-
-        ypred = model(batch_x)
-        _, predicted = torch.max(ypred.data, 1)
-
-        total += batch_y.size(0)
-        correct += (predicted == batch_y).sum().item()
-
-        c = predicted == batch_y.squeeze()
-        for i in range(batch_y.shape[0]):
-            label = batch_y[i]
-            class_correct[label] += c[i].item()
-            class_total[label] += 1
+    # on CPU the model is already int8-quantized; autocast only helps on CUDA
+    use_autocast = device.type == "cuda"
+
+    with torch.inference_mode():
+        for batch_x, batch_y in tqdm(
+            data_loader,
+            unit="batches",
+            desc="Testing...",
+            mininterval=1.0,
+            miniters=50,
+            smoothing=0,
+        ):
+            batch_x = batch_x.contiguous(memory_format=torch.channels_last)
+
+            with torch.autocast(
+                device_type=device.type, dtype=torch.float16, enabled=use_autocast
+            ):
+                ypred = model(batch_x)
+            predicted = ypred.argmax(1)
+            eq = predicted.eq(batch_y)
+
+            total += batch_y.size(0)
+            correct += eq.sum()
+
+            correct_mask = eq.to(torch.float32)
+            class_correct.scatter_add_(0, batch_y, correct_mask)
+            class_total.scatter_add_(0, batch_y, torch.ones_like(correct_mask))
+
+    correct = int(correct.item())
+    class_correct = class_correct.cpu().tolist()
+    class_total = class_total.cpu().tolist()
 
     accuracy = 100 * correct / total
     results["average_accuracy"] = accuracy
@@ -116,15 +95,39 @@ def save_results_and_conf(
     return results_path, conf_path
 
 
-def load_to_device(path_to_model: Path) -> nn.Module:
+def quantize_model(model: nn.Module, calibration_loader: TensorLoader) -> nn.Module:
+    model.eval()
+    torch.ao.quantization.fuse_modules(
+        model, [["conv1", "relu1"], ["conv2", "relu2"]], inplace=True
+    )
+    model.qconfig = torch.ao.quantization.get_default_qconfig("x86")
+    torch.ao.quantization.prepare(model, inplace=True)
+
+    with torch.no_grad():
+        for batch_i, (batch_x, _) in enumerate(calibration_loader):
+            model(batch_x)
+            if batch_i >= 100:
+                break
+
+    torch.ao.quantization.convert(model, inplace=True)
+    return model
+
+
+def load_to_device(
+    path_to_model: Path, device: torch.device, calibration_loader: TensorLoader
+) -> nn.Module:
     loaded_model = MNIST_CNN()
 
-    try:
-        weights_dict = torch.load(path_to_model)
-        loaded_model.load_state_dict(weights_dict)
-    except:
-        weights_dict = torch.load(path_to_model, map_location=torch.device("cpu"))
-        loaded_model.load_state_dict(weights_dict)
+    weights_dict = torch.load(
+        path_to_model, map_location=device, mmap=True, weights_only=True
+    )
+    loaded_model.load_state_dict(weights_dict)
+
+    if device.type == "cpu":
+        loaded_model = quantize_model(loaded_model, calibration_loader)
+        traced = torch.jit.trace(loaded_model, torch.randn(1, 1, 28, 28))
+        frozen = torch.jit.freeze(traced)
+        loaded_model = torch.jit.optimize_for_inference(frozen)
 
     return loaded_model
 
@@ -179,10 +182,14 @@ if __name__ == "__main__":
         device = torch.device("cpu")
 
     _, test_loader = load_mnist(
-        path_to_data=conf["path_to_data"], batch_size=conf["batch_size"]
+        path_to_data=conf["path_to_data"], batch_size=conf["batch_size"], device=device
     )
 
-    loaded_model = load_to_device(conf["path_to_model"])
+    loaded_model = load_to_device(
+        conf["path_to_model"], device=device, calibration_loader=test_loader
+    )
+    if device.type == "cuda":
+        loaded_model = torch.compile(loaded_model, mode="reduce-overhead")
 
     eval_dict = eval(
         model=loaded_model, data_loader=test_loader, device=device, log=log
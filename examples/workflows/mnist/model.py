@@ -6,17 +6,21 @@ class MNIST_CNN(nn.Module):
     def __init__(self):
         super(MNIST_CNN, self).__init__()
 
+        self.quant = torch.ao.quantization.QuantStub()
         self.conv1 = nn.Conv2d(1, 32, kernel_size=5)
         self.conv2 = nn.Conv2d(32, 64, kernel_size=5)
 
-        self.relu = nn.ReLU(True)
+        self.relu1 = nn.ReLU(True)
+        self.relu2 = nn.ReLU(True)
         self.pool = nn.MaxPool2d(kernel_size=2)
         self.fc1 = nn.Linear(64 * 4 * 4, 10)
+        self.dequant = torch.ao.quantization.DeQuantStub()
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = self.relu(self.pool(self.conv1(x)))
-        x = self.relu(self.pool(self.conv2(x)))
-        x = x.view(-1, 64 * 4 * 4)
+        x = self.quant(x)
+        x = self.relu1(self.pool(self.conv1(x)))
+        x = self.relu2(self.pool(self.conv2(x)))
+        x = torch.flatten(x, 1)
         x = self.fc1(x)
 
-        return nn.functional.log_softmax(x, dim=1)
+        return self.dequant(x)
@@ -3,85 +3,55 @@ import json
 import logging
 from pathlib import Path
 from typing import Dict, Tuple
-from pathlib import Path
-from typing import Dict, Tuple
-
-import torch.utils.data as data
-from torchvision import transforms as tfs
-from torchvision.datasets import MNIST
 
 import torch
 import torch.nn as nn
-import torch.utils.data as data
 from tqdm import tqdm
 
+from download import TensorLoader, load_mnist
+from model import MNIST_CNN
 
-def load_mnist(
-    path_to_data: Path, batch_size: int
-) -> Tuple[data.DataLoader, data.DataLoader]:
-    mean = [0.5]
-    std = [0.5]
-    transforms = tfs.Compose([tfs.ToTensor(), tfs.Normalize(mean, std)])
-
-    mnist_train = MNIST(path_to_data, train=True, transform=transforms, download=False)
-    mnist_test = MNIST(path_to_data, train=False, transform=transforms, download=False)
-
-    train_loader = data.DataLoader(mnist_train, batch_size=batch_size, shuffle=True)
-    test_loader = data.DataLoader(mnist_test, batch_size=batch_size)
-
-    return train_loader, test_loader
-
-class MNIST_CNN(nn.Module):
-    def __init__(self):
-        super(MNIST_CNN, self).__init__()
-
-        self.conv1 = nn.Conv2d(1, 32, kernel_size=5)
-        self.conv2 = nn.Conv2d(32, 64, kernel_size=5)
-
-        self.relu = nn.ReLU(True)
-        self.pool = nn.MaxPool2d(kernel_size=2)
-        self.fc1 = nn.Linear(64 * 4 * 4, 10)
-
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = self.relu(self.pool(self.conv1(x)))
-        x = self.relu(self.pool(self.conv2(x)))
-        x = x.view(-1, 64 * 4 * 4)
-        x = self.fc1(x)
-
-        return nn.functional.log_softmax(x, dim=1)
+torch.backends.cudnn.benchmark = True
+torch.set_float32_matmul_precision("high")
 
 
 def train(
     model: nn.Module,
-    data_loader: data.DataLoader,
+    data_loader: TensorLoader,
     conf: Dict,
     device: torch.device,
     log: logging.Logger,
 ) -> nn.Module:
     log.info("Training...")
 
-    model.to(device)
+    model.to(device, memory_format=torch.channels_last)
     model.train()
-    optimiser = torch.optim.SGD(model.parameters(), lr=conf["lr"])
+    optimiser = torch.optim.SGD(
+        model.parameters(), lr=conf["lr"], fused=device.type == "cuda"
+    )
     loss_func = nn.CrossEntropyLoss()
+    scaler = torch.amp.GradScaler(device.type, enabled=device.type == "cuda")
+    autocast_dtype = torch.bfloat16 if device.type == "cpu" else torch.float16
 
     for epoch in range(conf["epochs"]):
-        for _, (batch_x, batch_y) in enumerate(
-            tqdm(
-                data_loader,
-                unit="batches",
-                desc=f"Training epoch {epoch+1}/{conf['epochs']}",
-            )
+        for batch_x, batch_y in tqdm(
+            data_loader,
+            unit="batches",
+            desc=f"Training epoch {epoch+1}/{conf['epochs']}",
+            mininterval=1.0,
+            miniters=50,
+            smoothing=0,
         ):
-            batch_x = batch_x.to(device)
-            batch_y = batch_y.to(device)
+            batch_x = batch_x.contiguous(memory_format=torch.channels_last)
 
-            optimiser.zero_grad()
+            optimiser.zero_grad(set_to_none=True)
 
-            ypred = model(batch_x)
-            loss = loss_func(input=ypred, target=batch_y)
-            loss.backward()
-            optimiser.step()
+            with torch.autocast(device_type=device.type, dtype=autocast_dtype):
+                ypred = model(batch_x)
+                loss = loss_func(input=ypred, target=batch_y)
+            scaler.scale(loss).backward()
+            scaler.step(optimiser)
+            scaler.update()
 
     model.eval()
     return model
@@ -91,7 +61,8 @@ def save_model_and_conf(
     model: nn.Module, conf: Dict, output_dir: Path
 ) -> Tuple[Path, Path]:
     model_path = output_dir / "model.pkl"
-    torch.save(model.state_dict(), model_path)
+    # torch.compile wraps the model; save the original so keys stay stable
+    torch.save(getattr(model, "_orig_mod", model).state_dict(), model_path)
     if not model_path.exists():
         raise IOError("failed to save the model")
 
@@ -151,10 +122,12 @@ if __name__ == "__main__":
         device = torch.device("cpu")
 
     train_loader, _ = load_mnist(
-        path_to_data=conf["path_to_data"], batch_size=conf["batch_size"]
+        path_to_data=conf["path_to_data"], batch_size=conf["batch_size"], device=device
     )
 
     model = MNIST_CNN()
+    compile_mode = "reduce-overhead" if device.type == "cuda" else "max-autotune"
+    model = torch.compile(model, mode=compile_mode)
 
     trained_model = train(
         model=model, data_loader=train_loader, conf=conf, device=device, log=log